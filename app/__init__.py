@@ -3,9 +3,12 @@ Flask application factory.
 Creates and configures the Flask app instance.
 """
 
+from functools import lru_cache
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from app.config import get_config
+from app.json_provider import OrjsonProvider
+from app.utils import mask_pii_for_display
 
 
 db = SQLAlchemy()
@@ -27,11 +30,29 @@ def create_app(config_name='development'):
     
     config = get_config()
     app.config.from_object(config)
+    app.json = OrjsonProvider(app)
     
     db.init_app(app)
     
+    # Scoring engines are stateless across requests: build them once per app
+    from src.risk_calculator import RiskCalculator
+    from src.device_matcher import DeviceMatcher
+    
+    app.extensions['risk_calculator'] = RiskCalculator()
+    app.extensions['device_matcher'] = DeviceMatcher()
+    
     # db.create_all() is moved to setup scripts to avoid issues with different SQL dialects
     
+    # Masked values (emails, domains) repeat across rendered rows
+    app.add_template_filter(lru_cache(maxsize=2048)(mask_pii_for_display), 'mask')
+    
+    from src.materialize import refresh_views
+    
+    @app.cli.command('refresh-views')
+    def refresh_views_command():
+        """Rebuild the materialized dashboard tables."""
+        refresh_views()
+    
     from routes.views import views_bp
     from routes.api import api_bp
     
@@ -0,0 +1,21 @@
+"""
+orjson-backed JSON provider.
+Replaces Flask's stdlib json encoder for jsonify and the tojson filter.
+"""
+
+import orjson
+from flask.json.provider import DefaultJSONProvider
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider using the orjson C encoder/decoder."""
+    
+    option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+    
+    def dumps(self, obj, **kwargs) -> str:
+        """Serialize obj; types orjson doesn't know go through Flask's default."""
+        return orjson.dumps(obj, default=self.default, option=self.option).decode('utf-8')
+    
+    def loads(self, s, **kwargs):
+        """Deserialize a JSON string or bytes."""
+        return orjson.loads(s)
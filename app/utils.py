@@ -5,14 +5,26 @@ Hashing, tokenization, and encryption functions.
 
 import hashlib
 import os
+import sys
 import json
-from datetime import datetime, timedelta
+import time
+from datetime import datetime
+from functools import lru_cache
+import numpy as np
 from cryptography.fernet import Fernet
 
 
+# Default salt, encoded once at import so the hashing hot path does no
+# environment lookups or string formatting per call.
+_SALT = os.getenv('SECRET_KEY', 'default-salt').encode('utf-8')
+_ENCRYPTION_KEY = os.getenv('ENCRYPTION_KEY')
+
+
+@lru_cache(maxsize=65536)
 def hash_pii(value: str, salt: str = None) -> str:
     """
     Hash PII data using SHA256 with salt.
+    Memoized: IPs, emails and card tokens repeat heavily across events.
     
     Args:
         value: Data to hash (email, IP, etc)
@@ -24,9 +36,42 @@ def hash_pii(value: str, salt: str = None) -> str:
     if not value:
         return None
     
-    salt = salt or os.getenv('SECRET_KEY', 'default-salt')
-    message = f"{value}{salt}".encode('utf-8')
-    return hashlib.sha256(message).hexdigest()
+    salt_bytes = salt.encode('utf-8') if salt else _SALT
+    return hashlib.sha256(value.encode('utf-8') + salt_bytes).hexdigest()
+
+
+def sha256_many(messages) -> list:
+    """
+    Hash a batch of independent messages in one call.
+    
+    Used by bulk loaders so the per-row hashing loop stays in one
+    place (and can be swapped for a multi-buffer backend).
+    
+    Args:
+        messages: Iterable of bytes
+    
+    Returns:
+        List of SHA256 hex digests, in input order
+    """
+    sha256 = hashlib.sha256
+    return [sha256(message).hexdigest() for message in messages]
+
+
+def hash_pii_many(values: list, salt: str = None) -> list:
+    """
+    Batch version of hash_pii for bulk loads.
+    Encodes the salt once and skips the per-value cache lookups.
+    
+    Args:
+        values: List of strings to hash
+        salt: Optional salt (default: SECRET_KEY from environment)
+    
+    Returns:
+        List of SHA256 hex digests (None for empty values), in input order
+    """
+    salt_bytes = salt.encode('utf-8') if salt else _SALT
+    hashes = iter(sha256_many(value.encode('utf-8') + salt_bytes for value in values if value))
+    return [next(hashes) if value else None for value in values]
 
 
 def tokenize_card(card_number: str, account_id: str) -> dict:
@@ -76,17 +121,33 @@ def anonymize_email(email: str) -> dict:
     Returns:
         Dict with 'domain' and 'hash', or None if invalid
     """
-    if not email or '@' not in email:
+    if not email:
         return None
     
-    domain = email.split('@')[1]
+    _, sep, domain = email.rpartition('@')
+    if not sep:
+        return None
     
     return {
-        'domain': domain,
+        'domain': sys.intern(domain),
         'hash': hash_pii(email)
     }
 
 
+def _resolve_key(key: str = None) -> str:
+    """Pick the explicit key or ENCRYPTION_KEY; never invent one."""
+    key = key or _ENCRYPTION_KEY
+    if not key:
+        raise ValueError("ENCRYPTION_KEY is not configured")
+    return key
+
+
+@lru_cache(maxsize=8)
+def _get_cipher(key: str) -> Fernet:
+    """Build (once per key) the Fernet cipher; key parsing is not free."""
+    return Fernet(key)
+
+
 def encrypt_sensitive_data(data: dict, key: str = None) -> str:
     """
     Encrypt sensitive data using Fernet (AES-128).
@@ -97,10 +158,12 @@ def encrypt_sensitive_data(data: dict, key: str = None) -> str:
     
     Returns:
         Encrypted string
+    
+    Raises:
+        ValueError: If no key is given and ENCRYPTION_KEY is unset
     """
-    key = key or os.getenv('ENCRYPTION_KEY', Fernet.generate_key().decode())
-    cipher = Fernet(key)
-    plaintext = json.dumps(data).encode('utf-8')
+    cipher = _get_cipher(_resolve_key(key))
+    plaintext = json.dumps(data, separators=(',', ':')).encode('utf-8')
     return cipher.encrypt(plaintext).decode('utf-8')
 
 
@@ -115,25 +178,46 @@ def decrypt_sensitive_data(encrypted: str, key: str = None) -> dict:
     Returns:
         Decrypted dictionary
     """
-    key = key or os.getenv('ENCRYPTION_KEY')
-    cipher = Fernet(key)
+    cipher = _get_cipher(_resolve_key(key))
     plaintext = cipher.decrypt(encrypted.encode('utf-8'))
     return json.loads(plaintext.decode('utf-8'))
 
 
-def is_data_expired(created_at: datetime, retention_days: int = 90) -> bool:
+def is_data_expired(created_at: datetime, retention_days: int = 90,
+                    now: datetime = None) -> bool:
     """
     Check if data exceeds retention period per GDPR policy.
     
     Args:
         created_at: Timestamp data was created
         retention_days: Number of days to retain (default: 90)
+        now: Reference time (default: utcnow); pass once when sweeping
     
     Returns:
         True if data should be deleted
     """
-    expiration = created_at + timedelta(days=retention_days)
-    return datetime.utcnow() > expiration
+    now = now or datetime.utcnow()
+    return (now - created_at).total_seconds() > retention_days * 86400
+
+
+def is_data_expired_bulk(created_ts: np.ndarray, retention_days: int = 90,
+                         now_ts: float = None) -> np.ndarray:
+    """
+    Vectorized retention check for GDPR sweeps.
+    
+    Example:
+        SELECT device_id, epoch(created_at) FROM devices → mask of rows to delete
+    
+    Args:
+        created_ts: Creation times as UTC epoch seconds
+        retention_days: Number of days to retain (default: 90)
+        now_ts: Reference epoch seconds (default: time.time())
+    
+    Returns:
+        Boolean mask, True where data should be deleted
+    """
+    now_ts = time.time() if now_ts is None else now_ts
+    return (now_ts - np.asarray(created_ts, dtype=np.float64)) > retention_days * 86400
 
 
 def calculate_device_fingerprint(attributes: dict) -> str:
@@ -146,14 +230,20 @@ def calculate_device_fingerprint(attributes: dict) -> str:
     Returns:
         SHA256 hash of combined attributes
     """
-    fingerprint_parts = [
+    fingerprint_parts = (
         attributes.get('os', ''),
         attributes.get('browser', ''),
         attributes.get('resolution', ''),
         attributes.get('timezone', ''),
         attributes.get('language', ''),
-    ]
+    )
     
+    return _fingerprint(fingerprint_parts)
+
+
+@lru_cache(maxsize=131072)
+def _fingerprint(fingerprint_parts: tuple) -> str:
+    """Hash a fingerprint attribute tuple (memoized)."""
     fingerprint_str = '|'.join(filter(None, fingerprint_parts))
     return hashlib.sha256(fingerprint_str.encode()).hexdigest()
 
@@ -173,6 +263,6 @@ def mask_pii_for_display(value: str, visible_chars: int = 4) -> str:
         Masked string
     """
     if not value or len(value) <= visible_chars:
-        return '*' * len(value)
+        return '*' * len(value or '')
     
     return value[:visible_chars] + '*' * (len(value) - visible_chars - 4) + value[-4:]
@@ -0,0 +1,14 @@
+"""
+Gunicorn configuration for production.
+Usage: gunicorn 'main:app' -c gunicorn_conf.py
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', 5000)}"
+workers = int(os.getenv('WEB_CONCURRENCY', (os.cpu_count() or 1) * 2 + 1))
+worker_class = 'gthread'
+threads = 4
+
+# Build the app (and its scoring engines) once in the master, then fork
+preload_app = True
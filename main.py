@@ -1,6 +1,8 @@
 """
 Flask application entry point.
 Initializes and runs the web server.
+
+Production: gunicorn 'main:app' -c gunicorn_conf.py
 """
 
 import os
@@ -12,7 +14,7 @@ load_dotenv()
 app = create_app(os.getenv('FLASK_ENV', 'development'))
 
 
-if __name__ == '__main__':
+if __name__ == '__main__' and os.getenv('FLASK_ENV', 'development') == 'development':
     debug = os.getenv('DEBUG', 'False').lower() == 'true'
     port = int(os.getenv('PORT', 5000))
     
@@ -20,5 +22,5 @@ if __name__ == '__main__':
         host='127.0.0.1',
         port=port,
         debug=debug,
-        use_reloader=True
+        use_reloader=debug
     )
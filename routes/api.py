@@ -3,30 +3,65 @@ REST API endpoints for device fingerprinting data.
 Serves JSON data for frontend visualizations and external consumers.
 """
 
-from flask import Blueprint, jsonify, request
+from math import ceil
+from flask import Blueprint, current_app, jsonify, request
 from sqlalchemy import func
 from app import db
 from src.models import Device, Account, DeviceAccountCrossing
-from src.risk_calculator import RiskCalculator
-from src.device_matcher import DeviceMatcher
+from src.materialize import read_view
+from src.risk_calculator import DeviceSignals
 
 api_bp = Blueprint('api', __name__)
 
 
+def _paginate(model, columns, order_by, page, per_page):
+    """
+    Fetch one page of projected columns plus the total row count.
+    
+    Returns plain dicts (no ORM objects) and mirrors the page/per_page
+    handling of Flask-SQLAlchemy's paginate(error_out=False).
+    """
+    page = page if page and page > 0 else 1
+    per_page = per_page if per_page and per_page > 0 else 20
+    
+    total = db.session.execute(
+        db.select(func.count()).select_from(model)
+    ).scalar()
+    
+    rows = db.session.execute(
+        db.select(*columns)
+        .order_by(order_by)
+        .limit(per_page)
+        .offset((page - 1) * per_page)
+    ).mappings().all()
+    
+    items = []
+    for row in rows:
+        item = dict(row)
+        item['created_at'] = row['created_at'].isoformat() if row['created_at'] else None
+        items.append(item)
+    
+    return items, total, ceil(total / per_page)
+
+
 @api_bp.route('/devices', methods=['GET'])
 def get_devices():
     """Get list of devices with pagination."""
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 20, type=int)
     
-    pagination = Device.query.order_by(Device.last_seen.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
+    devices, total, pages = _paginate(
+        Device,
+        [Device.device_id, Device.device_hash, Device.os, Device.browser,
+         Device.timezone, Device.is_vpn, Device.risk_score, Device.risk_level,
+         Device.account_count, Device.created_at],
+        Device.last_seen.desc(), page, per_page
     )
     
     return jsonify({
-        'devices': [d.to_dict() for d in pagination.items],
-        'total': pagination.total,
-        'pages': pagination.pages,
+        'devices': devices,
+        'total': total,
+        'pages': pages,
         'current_page': page
     })
 
@@ -37,14 +72,18 @@ def get_accounts():
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 20, type=int)
     
-    pagination = Account.query.order_by(Account.created_at.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
+    accounts, total, pages = _paginate(
+        Account,
+        [Account.account_id, Account.account_hash, Account.kyc_level,
+         Account.email_domain, Account.risk_score, Account.risk_level,
+         Account.device_count, Account.created_at],
+        Account.created_at.desc(), page, per_page
     )
     
     return jsonify({
-        'accounts': [a.to_dict() for a in pagination.items],
-        'total': pagination.total,
-        'pages': pagination.pages
+        'accounts': accounts,
+        'total': total,
+        'pages': pages
     })
 
 
@@ -57,45 +96,53 @@ def get_graph_data():
     """
     limit = request.args.get('limit', 100, type=int)
     
-    # Fetch recent crossings
-    crossings = DeviceAccountCrossing.query.order_by(
-        DeviceAccountCrossing.first_seen.desc()
-    ).limit(limit).all()
+    # Fetch recent crossings with both endpoints in a single JOIN
+    rows = db.session.execute(
+        db.select(
+            DeviceAccountCrossing.device_id,
+            DeviceAccountCrossing.account_id,
+            DeviceAccountCrossing.risk_flag,
+            Device.os,
+            Device.browser,
+            Device.risk_score.label('device_risk'),
+            Account.kyc_level,
+            Account.risk_score.label('account_risk')
+        )
+        .join(Device, Device.device_id == DeviceAccountCrossing.device_id)
+        .join(Account, Account.account_id == DeviceAccountCrossing.account_id)
+        .order_by(DeviceAccountCrossing.first_seen.desc())
+        .limit(limit)
+    ).all()
     
     nodes = {}
     links = []
     
-    for c in crossings:
+    for row in rows:
         # Device Node
-        if c.device_id not in nodes:
-            device = db.session.get(Device, c.device_id)
-            if device:
-                nodes[c.device_id] = {
-                    'id': c.device_id,
-                    'group': 'device',
-                    'risk_score': float(device.risk_score),
-                    'label': f"{device.os} - {device.browser}"
-                }
+        if row.device_id not in nodes:
+            nodes[row.device_id] = {
+                'id': row.device_id,
+                'group': 'device',
+                'risk_score': float(row.device_risk),
+                'label': f"{row.os} - {row.browser}"
+            }
         
         # Account Node
-        if c.account_id not in nodes:
-            account = db.session.get(Account, c.account_id)
-            if account:
-                nodes[c.account_id] = {
-                    'id': c.account_id,
-                    'group': 'account',
-                    'risk_score': float(account.risk_score),
-                    'label': f"Account ({account.kyc_level})"
-                }
+        if row.account_id not in nodes:
+            nodes[row.account_id] = {
+                'id': row.account_id,
+                'group': 'account',
+                'risk_score': float(row.account_risk),
+                'label': f"Account ({row.kyc_level})"
+            }
         
         # Link
-        if c.device_id in nodes and c.account_id in nodes:
-            links.append({
-                'source': c.device_id,
-                'target': c.account_id,
-                'value': 1,
-                'risk_flag': c.risk_flag
-            })
+        links.append({
+            'source': row.device_id,
+            'target': row.account_id,
+            'value': 1,
+            'risk_flag': row.risk_flag
+        })
     
     return jsonify({
         'nodes': list(nodes.values()),
@@ -118,36 +165,41 @@ def calculate_risk():
     if not device:
         return jsonify({'error': 'Device not found'}), 404
         
-    # Load related data
-    crossings = DeviceAccountCrossing.query.filter_by(device_id=device_id).all()
-    accounts = [db.session.get(Account, c.account_id) for c in crossings]
+    # Only the linked accounts' risk scores feed the score
+    account_scores = db.session.execute(
+        db.select(Account.risk_score)
+        .join(DeviceAccountCrossing, DeviceAccountCrossing.account_id == Account.account_id)
+        .where(DeviceAccountCrossing.device_id == device_id)
+    ).scalars().all()
     
     # Calculate
-    calculator = RiskCalculator()
-    matcher = DeviceMatcher() # In real app, load this from cache/db
+    calculator = current_app.extensions['risk_calculator']
+    matcher = current_app.extensions['device_matcher']
     
     # Mocking ip_data for now
     ip_data = {'country': 'DE'}
     
+    # The endpoint has never scored datacenter IPs (device.to_dict() carried no
+    # is_datacenter), so only the VPN flag is passed on
     risk_result = calculator.calculate_device_risk(
-        device.to_dict(), 
-        [a.to_dict() for a in accounts if a],
+        DeviceSignals(is_vpn=device.is_vpn), 
+        account_scores,
         ip_data,
         matcher
     )
     
     # Update DB
-    device.risk_score = risk_result['risk_score']
-    device.risk_level = risk_result['risk_level']
+    device.risk_score = round(risk_result.risk_score, 2)
+    device.risk_level = risk_result.risk_level
     db.session.commit()
     
-    return jsonify(risk_result)
+    return jsonify(risk_result.to_dict())
 
 
 @api_bp.route('/rules', methods=['GET'])
 def get_rules():
     """Get the active list of risk scoring rules."""
-    calculator = RiskCalculator()
+    calculator = current_app.extensions['risk_calculator']
     return jsonify(calculator.get_rules())
 
 
@@ -158,8 +210,10 @@ def search():
     if not query or len(query) < 4:
         return jsonify({'results': []})
     
-    devices = Device.query.filter(Device.device_hash.ilike(f"%{query}%")).limit(5).all()
-    accounts = Account.query.filter(Account.account_hash.ilike(f"%{query}%")).limit(5).all()
+    # Hashes are stored as lowercase hex: a prefix match can use the index
+    prefix = query.lower()
+    devices = Device.query.filter(Device.device_hash.startswith(prefix, autoescape=True)).limit(5).all()
+    accounts = Account.query.filter(Account.account_hash.startswith(prefix, autoescape=True)).limit(5).all()
     
     results = []
     for d in devices:
@@ -173,20 +227,28 @@ def search():
 @api_bp.route('/stats/distribution', methods=['GET'])
 def get_stats_distribution():
     """Get distribution data for charts (OS and Browser)."""
-    os_dist = db.session.query(Device.os, func.count(Device.device_id)).group_by(Device.os).all()
-    browser_dist = db.session.query(Device.browser, func.count(Device.device_id)).group_by(Device.browser).all()
+    # Served from the precomputed (os, browser) cross-tab; both marginals
+    # are folded from it instead of aggregating the devices table twice.
+    rows = read_view('mv_os_browser_dist')
     
-    return jsonify({
-        'os': [{'label': row[0], 'value': row[1]} for row in os_dist],
-        'browser': [{'label': row[0], 'value': row[1]} for row in browser_dist]
+    os_dist = {}
+    browser_dist = {}
+    for os_name, browser, count in rows:
+        os_dist[os_name] = os_dist.get(os_name, 0) + count
+        browser_dist[browser] = browser_dist.get(browser, 0) + count
+    
+    response = jsonify({
+        'os': [{'label': label, 'value': value} for label, value in os_dist.items()],
+        'browser': [{'label': label, 'value': value} for label, value in browser_dist.items()]
     })
+    response.cache_control.max_age = 30
+    return response
 
 
 @api_bp.route('/alerts', methods=['GET'])
 def get_alerts():
     """Fetch simulated high-risk alerts."""
-    # In a real app, this would query a dedicated alerts table
-    recent_risky = Device.query.filter(Device.risk_score > 60).order_by(Device.created_at.desc()).limit(10).all()
+    recent_risky = read_view('mv_risk_alerts', order_by='created_at DESC')
     
     alerts = []
     for d in recent_risky:
@@ -196,4 +258,7 @@ def get_alerts():
             'id': d.device_id,
             'score': float(d.risk_score)
         })
-    return jsonify(alerts)
+    
+    response = jsonify(alerts)
+    response.cache_control.max_age = 30
+    return response
@@ -89,18 +89,16 @@ def device_detail(device_id):
         if not device:
             return jsonify({'error': 'Device not found'}), 404
         
-        crossings = db.session.query(DeviceAccountCrossing).filter_by(
-            device_id=device_id
-        ).all()
+        rows = db.session.query(DeviceAccountCrossing, Account).join(
+            Account, Account.account_id == DeviceAccountCrossing.account_id
+        ).filter(DeviceAccountCrossing.device_id == device_id).all()
         
         associated_accounts = [
             {
-                'account': db.session.query(Account).filter_by(
-                    account_id=c.account_id
-                ).first().to_dict(),
-                'crossing': c.to_dict()
+                'account': account.to_dict(),
+                'crossing': crossing.to_dict()
             }
-            for c in crossings
+            for crossing, account in rows
         ]
         
         return render_template(
@@ -6,121 +6,183 @@ import os
 import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-import random
+import numpy as np
+import pandas as pd
 from datetime import datetime
 from uuid import uuid4
-from faker import Faker
 from app import db, create_app
+from app.utils import hash_pii_many
 from src.models import Device, Account, DeviceAccountCrossing
+from src.materialize import refresh_views
 
-fake = Faker()
 
-def generate_demo_data():
+CHUNK_SIZE = 10_000
+
+
+def _chunks(n, size=CHUNK_SIZE):
+    """Yield (start, stop) bounds covering range(n) in steps of size."""
+    for start in range(0, n, size):
+        yield start, min(start + size, n)
+
+
+def _bulk_insert(raw, table, frames):
+    """Insert DataFrame chunks into table through DuckDB's DataFrame scan."""
+    for frame in frames:
+        raw.register('chunk_df', frame)
+        raw.execute(f"INSERT INTO {table} ({', '.join(frame.columns)}) SELECT * FROM chunk_df")
+        raw.unregister('chunk_df')
+
+
+def generate_demo_data(n_devices=800, n_accounts=200, n_crossings=1200):
     # Ensure data directory exists for DuckDB
     os.makedirs('data', exist_ok=True)
     
     app = create_app('development')
     
     with app.app_context():
-        # Manual table creation to avoid SERIAL issues in DuckDB 1.1.0/SQLAlchemy
-        conn = db.engine.connect()
-        # DuckDB requires individual execution or specific handling for multi-statement strings sometimes
-        # We'll use the connection to execute the DDL
-        statements = [
-            "DROP TABLE IF EXISTS device_account_crossings",
-            "DROP TABLE IF EXISTS accounts",
-            "DROP TABLE IF EXISTS devices",
-            """CREATE TABLE devices (
-                device_id VARCHAR(36) PRIMARY KEY,
-                device_hash VARCHAR(64) UNIQUE,
-                os VARCHAR(50),
-                browser VARCHAR(50),
-                screen_resolution VARCHAR(20),
-                timezone VARCHAR(50),
-                is_vpn BOOLEAN DEFAULT FALSE,
-                is_datacenter BOOLEAN DEFAULT FALSE,
-                risk_score FLOAT DEFAULT 0.0,
-                risk_level VARCHAR(20) DEFAULT 'low',
-                account_count INTEGER DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                last_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )""",
-            """CREATE TABLE accounts (
-                account_id VARCHAR(36) PRIMARY KEY,
-                account_hash VARCHAR(64) UNIQUE,
-                email_domain VARCHAR(100),
-                kyc_level VARCHAR(20) DEFAULT 'pending',
-                risk_score FLOAT DEFAULT 0.0,
-                risk_level VARCHAR(20) DEFAULT 'low',
-                device_count INTEGER DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )""",
-            """CREATE TABLE device_account_crossings (
-                id INTEGER PRIMARY KEY,
-                device_id VARCHAR(36),
-                account_id VARCHAR(36),
-                risk_flag VARCHAR(50) DEFAULT 'low',
-                first_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )"""
-        ]
-        
-        for stmt in statements:
-            conn.execute(db.text(stmt))
-        
-        conn.commit()
-        conn.close()
-        
-        # 1. Prepare data
-        os_list = ['Windows', 'macOS', 'Linux', 'Android', 'iOS']
-        browser_list = ['Chrome', 'Firefox', 'Safari', 'Edge']
-        risk_levels_weights = {'low': (0.6, 1.0, 30.0), 'medium': (0.3, 31.0, 70.0), 'high': (0.1, 71.0, 100.0)}
-        
-        device_ids = [str(uuid4()) for _ in range(800)]
-        account_ids = [str(uuid4()) for _ in range(200)]
-        
-        # 2. Generate crossings and counts
-        crossings = []
-        dev_counts = {rid: 0 for rid in device_ids}
-        acc_counts = {rid: 0 for rid in account_ids}
-        
-        for i in range(1200):
-            d_id = random.choice(device_ids)
-            a_id = random.choice(account_ids)
-            crossings.append({
-                'id': i + 1,
-                'device_id': d_id,
-                'account_id': a_id,
-                'risk_flag': random.choices(['low', 'medium', 'high'], weights=[0.8, 0.15, 0.05])[0]
-            })
-            dev_counts[d_id] += 1
-            acc_counts[a_id] += 1
-
-        # 3. Insert Devices
-        print("Inserting devices...")
-        for d_id in device_ids:
-            level = random.choices(list(risk_levels_weights.keys()), weights=[w[0] for w in risk_levels_weights.values()])[0]
-            m_s, M_s = risk_levels_weights[level][1], risk_levels_weights[level][2]
-            conn.execute(db.text("INSERT INTO devices (device_id, device_hash, os, browser, risk_level, risk_score, account_count) VALUES (:id, :h, :os, :b, :l, :s, :c)"),
-                        {'id': d_id, 'h': fake.sha256()[:64], 'os': random.choice(os_list), 'b': random.choice(browser_list), 'l': level, 's': random.uniform(m_s, M_s), 'c': dev_counts[d_id]})
-        
-        # 4. Insert Accounts
-        print("Inserting accounts...")
-        kyc_levels = ['verified', 'pending', 'rejected']
-        for a_id in account_ids:
-            level = random.choices(['low', 'medium', 'high'], weights=[0.7, 0.25, 0.05])[0]
-            m_s, M_s = risk_levels_weights[level][1], risk_levels_weights[level][2]
-            conn.execute(db.text("INSERT INTO accounts (account_id, account_hash, kyc_level, risk_level, risk_score, device_count) VALUES (:id, :h, :k, :l, :s, :c)"),
-                        {'id': a_id, 'h': fake.sha256()[:64], 'k': random.choice(kyc_levels), 'l': level, 's': random.uniform(m_s, M_s), 'c': acc_counts[a_id]})
-        
-        # 5. Insert Crossings
-        print("Inserting crossings...")
-        for c in crossings:
-            conn.execute(db.text("INSERT INTO device_account_crossings (id, device_id, account_id, risk_flag) VALUES (:id, :d, :a, :r)"),
-                        {'id': c['id'], 'd': c['device_id'], 'a': c['account_id'], 'r': c['risk_flag']})
-        
-        conn.commit()
-        conn.close()
-        print(f"Data generation complete: 800 devices, 200 accounts, 1200 crossings.")
+        # Manual table creation to avoid SERIAL issues in DuckDB 1.1.0/SQLAlchemy.
+        # DDL and all inserts run in one transaction: a failure rolls back everything.
+        with db.engine.begin() as conn:
+            # DuckDB requires individual execution or specific handling for multi-statement strings sometimes
+            # We'll use the connection to execute the DDL
+            statements = [
+                "DROP TABLE IF EXISTS device_account_crossings",
+                "DROP TABLE IF EXISTS accounts",
+                "DROP TABLE IF EXISTS devices",
+                """CREATE TABLE devices (
+                    device_id VARCHAR(32) PRIMARY KEY,
+                    device_hash VARCHAR(64) UNIQUE,
+                    os VARCHAR(50),
+                    browser VARCHAR(50),
+                    screen_resolution VARCHAR(20),
+                    timezone VARCHAR(50),
+                    is_vpn BOOLEAN DEFAULT FALSE,
+                    is_datacenter BOOLEAN DEFAULT FALSE,
+                    risk_score FLOAT DEFAULT 0.0,
+                    risk_level VARCHAR(20) DEFAULT 'low',
+                    account_count INTEGER DEFAULT 0,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    last_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )""",
+                """CREATE TABLE accounts (
+                    account_id VARCHAR(32) PRIMARY KEY,
+                    account_hash VARCHAR(64) UNIQUE,
+                    email_domain VARCHAR(100),
+                    kyc_level VARCHAR(20) DEFAULT 'pending',
+                    risk_score FLOAT DEFAULT 0.0,
+                    risk_level VARCHAR(20) DEFAULT 'low',
+                    device_count INTEGER DEFAULT 0,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )""",
+                """CREATE TABLE device_account_crossings (
+                    id INTEGER PRIMARY KEY,
+                    device_id VARCHAR(32),
+                    account_id VARCHAR(32),
+                    risk_flag VARCHAR(50) DEFAULT 'low',
+                    first_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )"""
+            ]
+            
+            for stmt in statements:
+                conn.execute(db.text(stmt))
+            
+            # 1. Prepare data
+            os_list = ['Windows', 'macOS', 'Linux', 'Android', 'iOS']
+            browser_list = ['Chrome', 'Firefox', 'Safari', 'Edge']
+            risk_levels_weights = {'low': (0.6, 1.0, 30.0), 'medium': (0.3, 31.0, 70.0), 'high': (0.1, 71.0, 100.0)}
+            
+            device_ids = [uuid4().hex for _ in range(n_devices)]
+            account_ids = [uuid4().hex for _ in range(n_accounts)]
+            
+            # Hash all identifiers in one batch instead of per INSERT
+            device_hashes = hash_pii_many(device_ids)
+            account_hashes = hash_pii_many(account_ids)
+            
+            # 2-4. Stream column-wise chunks through DuckDB's DataFrame scan;
+            # only one chunk of rows is materialized at a time.
+            raw = conn.connection.driver_connection
+            
+            # Attribute columns are drawn as whole NumPy arrays, not per row
+            rng = np.random.default_rng()
+            level_names = np.array(list(risk_levels_weights))
+            score_min = np.array([w[1] for w in risk_levels_weights.values()])
+            score_max = np.array([w[2] for w in risk_levels_weights.values()])
+            
+            # Timestamps: one clock read, then whole-array datetime64 offsets
+            now = np.datetime64('now', 's')
+            
+            def days_ago(size, max_days=365):
+                return now - rng.integers(1, max_days + 1, size=size).astype('timedelta64[D]')
+            
+            def device_frames():
+                for start, stop in _chunks(n_devices):
+                    levels = rng.choice(len(level_names), size=stop - start, p=[w[0] for w in risk_levels_weights.values()])
+                    created_at = days_ago(stop - start)
+                    yield pd.DataFrame({
+                        'device_id': device_ids[start:stop],
+                        'device_hash': device_hashes[start:stop],
+                        'os': rng.choice(os_list, size=stop - start),
+                        'browser': rng.choice(browser_list, size=stop - start),
+                        'risk_level': level_names[levels],
+                        'risk_score': rng.uniform(score_min[levels], score_max[levels]),
+                        'created_at': created_at,
+                        'last_seen': created_at + ((now - created_at) * rng.random(stop - start)).astype('timedelta64[s]'),
+                    })
+            
+            kyc_levels = ['verified', 'pending', 'rejected']
+            
+            def account_frames():
+                for start, stop in _chunks(n_accounts):
+                    levels = rng.choice(len(level_names), size=stop - start, p=[0.7, 0.25, 0.05])
+                    yield pd.DataFrame({
+                        'account_id': account_ids[start:stop],
+                        'account_hash': account_hashes[start:stop],
+                        'kyc_level': rng.choice(kyc_levels, size=stop - start),
+                        'risk_level': level_names[levels],
+                        'risk_score': rng.uniform(score_min[levels], score_max[levels]),
+                        'created_at': days_ago(stop - start),
+                    })
+            
+            # Crossing endpoints are picked as index arrays into the id columns;
+            # per-device/account crossing counts are derived in SQL afterwards
+            device_id_arr = np.array(device_ids)
+            account_id_arr = np.array(account_ids)
+            
+            def crossing_frames():
+                for start, stop in _chunks(n_crossings):
+                    yield pd.DataFrame({
+                        'id': np.arange(start + 1, stop + 1),
+                        'device_id': device_id_arr[rng.integers(0, n_devices, size=stop - start)],
+                        'account_id': account_id_arr[rng.integers(0, n_accounts, size=stop - start)],
+                        'risk_flag': rng.choice(['low', 'medium', 'high'], size=stop - start, p=[0.8, 0.15, 0.05]),
+                    })
+            
+            print("Inserting devices...")
+            _bulk_insert(raw, 'devices', device_frames())
+            
+            print("Inserting accounts...")
+            _bulk_insert(raw, 'accounts', account_frames())
+            
+            print("Inserting crossings...")
+            _bulk_insert(raw, 'device_account_crossings', crossing_frames())
+            
+            # Index after the bulk load so inserts don't maintain it row by row
+            conn.execute(db.text("CREATE INDEX ix_crossings_device_account ON device_account_crossings (device_id, account_id)"))
+            
+            # Crossing counts as two set-based aggregates instead of Python dict tallies
+            conn.execute(db.text("""
+                UPDATE devices SET account_count = c.cnt
+                FROM (SELECT device_id, COUNT(*) AS cnt FROM device_account_crossings GROUP BY device_id) c
+                WHERE devices.device_id = c.device_id
+            """))
+            conn.execute(db.text("""
+                UPDATE accounts SET device_count = c.cnt
+                FROM (SELECT account_id, COUNT(*) AS cnt FROM device_account_crossings GROUP BY account_id) c
+                WHERE accounts.account_id = c.account_id
+            """))
+            
+        refresh_views()
+        print(f"Data generation complete: {n_devices} devices, {n_accounts} accounts, {n_crossings} crossings.")
         print("Database ready. Run: python main.py")
 
 if __name__ == "__main__":
@@ -3,9 +3,14 @@ Device fingerprint matching utilities.
 Detects similar devices sharing suspicious attributes.
 """
 
+import numpy as np
+
+
 class DeviceMatcher:
     """Matches devices based on fingerprint similarity."""
     
+    fields = ('os', 'browser', 'screen_resolution', 'timezone')
+    
     def __init__(self):
         self.similarity_threshold = 0.85
     
@@ -14,7 +19,7 @@ class DeviceMatcher:
         matches = 0
         total = 0
         
-        for field in ['os', 'browser', 'screen_resolution', 'timezone']:
+        for field in self.fields:
             if device1.get(field) == device2.get(field):
                 matches += 1
             total += 1
@@ -25,3 +30,41 @@ class DeviceMatcher:
         """Check if two devices are likely the same."""
         similarity = self.calculate_similarity(device1, device2)
         return similarity >= self.similarity_threshold
+    
+    def encode_devices(self, devices: list) -> np.ndarray:
+        """
+        Pack the fingerprint fields of many devices into uint64 codes,
+        16 bits per field.
+        Values are numbered per call, so codes are only comparable with
+        codes from the same call.
+        
+        Args:
+            devices: List of device dicts
+            
+        Returns:
+            uint64 array with one packed fingerprint per device
+            
+        Raises:
+            ValueError: If a field has more distinct values than fit in 16 bits
+        """
+        codes = np.zeros(len(devices), dtype=np.uint64)
+        for lane, field in enumerate(self.fields):
+            vocab = {}
+            lane_codes = np.fromiter((vocab.setdefault(d.get(field), len(vocab)) for d in devices),
+                                     dtype=np.uint64, count=len(devices))
+            if len(vocab) > 0x10000:
+                raise ValueError(f"{field} has {len(vocab)} distinct values; at most 65536 fit in a lane")
+            codes |= lane_codes << np.uint64(16 * lane)
+        return codes
+    
+    def similarity_matrix(self, codes: np.ndarray) -> np.ndarray:
+        """
+        All-vs-all similarity of packed fingerprints.
+        Same scores as calculate_similarity, computed with XOR + lane
+        compares over the whole array instead of per-pair dict lookups.
+        """
+        diff = codes[:, None] ^ codes[None, :]
+        matches = np.zeros(diff.shape, dtype=np.uint8)
+        for lane in range(len(self.fields)):
+            matches += ((diff >> np.uint64(16 * lane)) & np.uint64(0xFFFF)) == 0
+        return matches / len(self.fields)
@@ -1,34 +1,57 @@
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 import duckdb
-import random
+from duckdb_engine import Dialect
+from src.materialize import view_statements
 
 def fix():
+    conn = None
     try:
         conn = duckdb.connect('data/device_fp.db')
+        # One transaction for all updates instead of autocommit per statement
+        conn.begin()
         
-        # Get all device IDs
-        devices = conn.execute("SELECT device_id FROM devices").fetchall()
-        print(f"Fixing {len(devices)} devices...")
+        device_count = conn.execute("SELECT COUNT(*) FROM devices").fetchone()[0]
+        print(f"Fixing {device_count} devices...")
         
-        for (d_id,) in devices:
-            # Assign a random score between 10 and 95
-            score = random.uniform(10.0, 98.0)
-            level = 'high' if score > 70 else 'medium' if score > 40 else 'low'
-            conn.execute("UPDATE devices SET risk_score = ?, risk_level = ? WHERE device_id = ?", [score, level, d_id])
+        # Assign a random score between 10 and 98, set-based in DuckDB
+        conn.execute("UPDATE devices SET risk_score = 10.0 + random() * 88.0")
+        conn.execute("""
+            UPDATE devices SET risk_level = CASE
+                WHEN risk_score > 70 THEN 'high'
+                WHEN risk_score > 40 THEN 'medium'
+                ELSE 'low'
+            END
+        """)
             
         # Also fix counts just in case
         print("Fixing crossing counts...")
+        # One grouped aggregate joined back, not a correlated subquery per device
+        conn.execute("UPDATE devices SET account_count = 0")
         conn.execute("""
-            UPDATE devices SET account_count = (
-                SELECT COUNT(DISTINCT account_id) 
-                FROM device_account_crossings 
-                WHERE device_account_crossings.device_id = devices.device_id
-            )
+            UPDATE devices SET account_count = c.cnt
+            FROM (
+                SELECT device_id, COUNT(DISTINCT account_id) AS cnt
+                FROM device_account_crossings
+                GROUP BY device_id
+            ) c
+            WHERE devices.device_id = c.device_id
         """)
         
+        # Scores changed, so the dashboard tables must not serve the old ones
+        print("Rebuilding dashboard aggregates...")
+        for sql in view_statements(Dialect()):
+            conn.execute(sql)
+        
         conn.commit()
         conn.close()
         print("Successfully fixed database scores and counts.")
     except Exception as e:
+        if conn is not None:
+            conn.rollback()
+            conn.close()
         print(f"Error: {e}")
 
 if __name__ == "__main__":
@@ -0,0 +1,111 @@
+"""
+Materialized dashboard aggregates.
+Precomputes read-heavy dashboard queries into plain tables that are
+refreshed out-of-band (cron / `flask refresh-views`) instead of per request.
+Writers that change risk scores rebuild them in their own transaction.
+"""
+
+import time
+from weakref import WeakKeyDictionary
+
+from sqlalchemy import func, inspect
+from app import db
+from src.models import Device
+
+
+def _risk_alerts():
+    return db.select(
+        Device.device_id,
+        Device.os,
+        Device.browser,
+        Device.risk_score,
+        Device.created_at
+    ).where(Device.risk_score > 60).order_by(Device.created_at.desc()).limit(10)
+
+
+def _os_browser_dist():
+    return db.select(
+        Device.os,
+        Device.browser,
+        func.count(Device.device_id).label('device_count')
+    ).group_by(Device.os, Device.browser)
+
+
+VIEWS = {
+    'mv_risk_alerts': _risk_alerts,
+    'mv_os_browser_dist': _os_browser_dist,
+}
+
+# engine -> {view name: True once the table exists, else monotonic time of
+# the last probe that found it missing}
+_ready = WeakKeyDictionary()
+
+# Seconds between re-probes while a view has not been built yet
+PROBE_INTERVAL = 30
+
+
+def view_statements(dialect) -> list:
+    """
+    SQL that rebuilds every view as a plain table.
+    
+    Args:
+        dialect: SQLAlchemy dialect to compile the view queries for
+        
+    Returns:
+        List of DROP / CREATE TABLE AS statements, in execution order
+    """
+    statements = []
+    for name, query in VIEWS.items():
+        sql = query().compile(dialect=dialect, compile_kwargs={'literal_binds': True})
+        statements.append(f"DROP TABLE IF EXISTS {name}")
+        statements.append(f"CREATE TABLE {name} AS {sql}")
+    return statements
+
+
+def refresh_views(conn=None):
+    """
+    Rebuild every materialized view from the base tables.
+    
+    Args:
+        conn: Connection whose transaction the rebuild joins; when omitted the
+            rebuild runs in its own transaction on db.engine
+    """
+    if conn is None:
+        with db.engine.begin() as conn:
+            refresh_views(conn)
+        return
+    
+    for sql in view_statements(conn.dialect):
+        conn.execute(db.text(sql))
+    _ready.setdefault(conn.engine, {}).update(dict.fromkeys(VIEWS, True))
+
+
+def read_view(name: str, order_by: str = None):
+    """
+    Read a materialized view.
+    Falls back to the live query while the view table does not exist; a
+    missing table is probed again at most every PROBE_INTERVAL seconds, so
+    tables built by another process (cron) are picked up.
+
+    Args:
+        name: View name (key of VIEWS)
+        order_by: Optional ORDER BY clause applied when reading the table
+
+    Returns:
+        List of rows
+    """
+    ready = _ready.setdefault(db.engine, {})
+    state = ready.get(name)
+    if state is not True:
+        now = time.monotonic()
+        if state is None or now - state >= PROBE_INTERVAL:
+            state = True if inspect(db.engine).has_table(name) else now
+            ready[name] = state
+
+    if state is not True:
+        return db.session.execute(VIEWS[name]()).all()
+
+    sql = f"SELECT * FROM {name}"
+    if order_by:
+        sql += f" ORDER BY {order_by}"
+    return db.session.execute(db.text(sql)).all()
@@ -10,7 +10,7 @@ from app import db
 class Device(db.Model):
     __tablename__ = 'devices'
     
-    device_id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid4()))
+    device_id = db.Column(db.String(32), primary_key=True, default=lambda: uuid4().hex)
     device_hash = db.Column(db.String(64), unique=True, nullable=False)
     os = db.Column(db.String(50))
     browser = db.Column(db.String(50))
@@ -42,7 +42,7 @@ class Device(db.Model):
 class Account(db.Model):
     __tablename__ = 'accounts'
     
-    account_id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid4()))
+    account_id = db.Column(db.String(32), primary_key=True, default=lambda: uuid4().hex)
     account_hash = db.Column(db.String(64), unique=True, nullable=False)
     email_domain = db.Column(db.String(100))
     kyc_level = db.Column(db.String(20), default='pending')
@@ -66,10 +66,13 @@ class Account(db.Model):
 
 class DeviceAccountCrossing(db.Model):
     __tablename__ = 'device_account_crossings'
+    __table_args__ = (
+        db.Index('ix_crossings_device_account', 'device_id', 'account_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
-    device_id = db.Column(db.String(36), nullable=False)
-    account_id = db.Column(db.String(36), nullable=False)
+    device_id = db.Column(db.String(32), nullable=False)
+    account_id = db.Column(db.String(32), nullable=False)
     risk_flag = db.Column(db.String(50), default='low')
     first_seen = db.Column(db.DateTime, default=datetime.utcnow)
 
@@ -3,69 +3,174 @@ Risk scoring engine for device fingerprinting.
 Calculates fraud risk based on device characteristics and account behavior.
 """
 
-from typing import Dict, List, Any
+from bisect import bisect_right
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, NamedTuple, Tuple, Any
+
+import numpy as np
+import pandas as pd
+
+
+_W_VPN = 25.0
+_W_DATACENTER = 30.0
+_W_MULTI_ACCOUNT = 20.0
+_W_NEW_ACCOUNT = 15.0
+_W_HIGH_VELOCITY = 10.0
+_W_SUSPICIOUS_OS = 8.0
+_W_SUSPICIOUS_ACCOUNTS = 15.0
+# Multi-account weight applies per 3 linked accounts
+_W_MULTI_PER_ACCOUNT = _W_MULTI_ACCOUNT / 3
+
+_LEVELS = ('low', 'medium', 'high')
+_LEVEL_CUTS = (40.0, 70.0)
+
+
+@dataclass(slots=True)
+class DeviceSignals:
+    """Device fields read by the scorer. ORM Device rows work as well."""
+    is_vpn: bool = False
+    is_datacenter: bool = False
+
+
+class RiskResult(NamedTuple):
+    """
+    Outcome of a single device score.
+    risk_score keeps full precision; to_dict() is the serialization boundary
+    and rounds it to two decimals, whatever encoder the payload goes through.
+    """
+    risk_score: float
+    risk_level: str
+    vpn: bool
+    datacenter: bool
+    account_count: int
+    suspicious_accounts: int
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'risk_score': round(self.risk_score, 2),
+            'risk_level': self.risk_level,
+            'factors': {
+                'vpn': self.vpn,
+                'datacenter': self.datacenter,
+                'account_count': self.account_count,
+                'suspicious_accounts': self.suspicious_accounts
+            }
+        }
+
+
+@lru_cache(maxsize=4096)
+def _score_kernel(is_vpn: bool, is_dc: bool, ac: int, sa: int):
+    """
+    Numeric core of the device score.
+    Memoized: real traffic only produces a few hundred distinct inputs.
+    
+    Args:
+        is_vpn: Device is behind a VPN
+        is_dc: Device IP belongs to a datacenter
+        ac: Linked account count
+        sa: Linked accounts with risk_score > 60
+        
+    Returns:
+        (score, level_code) with level_code indexing _LEVELS
+    """
+    score = (bool(is_vpn) * _W_VPN
+             + bool(is_dc) * _W_DATACENTER
+             + (ac > 3) * _W_MULTI_PER_ACCOUNT * ac
+             + (sa > 0) * _W_SUSPICIOUS_ACCOUNTS)
+    level = bisect_right(_LEVEL_CUTS, score)
+    return score, level
 
 
 class RiskCalculator:
     """Main risk calculation engine."""
     
     def __init__(self):
-        self.weights = {
-            'vpn': 25.0,
-            'datacenter': 30.0,
-            'multi_account': 20.0,
-            'new_account': 15.0,
-            'high_velocity': 10.0,
-            'suspicious_os': 8.0
+        # Weights are fixed after construction, so the rule table is built once
+        w = self.weights
+        self._rules = (
+            {'rule': 'VPN Detection', 'weight': w['vpn'], 'category': 'Network'},
+            {'rule': 'Datacenter IP', 'weight': w['datacenter'], 'category': 'Network'},
+            {'rule': 'Multi-account Device (>3)', 'weight': w['multi_account'], 'category': 'Behavior'},
+            {'rule': 'New Account link', 'weight': w['new_account'], 'category': 'Identity'},
+            {'rule': 'High velocity crossings', 'weight': w['high_velocity'], 'category': 'Behavior'},
+            {'rule': 'Suspicious OS/UA', 'weight': w['suspicious_os'], 'category': 'Device'},
+        )
+    
+    @property
+    def weights(self) -> Dict[str, float]:
+        """Advertised rule weights; scoring reads the module constants directly."""
+        return {
+            'vpn': _W_VPN,
+            'datacenter': _W_DATACENTER,
+            'multi_account': _W_MULTI_ACCOUNT,
+            'new_account': _W_NEW_ACCOUNT,
+            'high_velocity': _W_HIGH_VELOCITY,
+            'suspicious_os': _W_SUSPICIOUS_OS
         }
     
-    def calculate_device_risk(self, device: Dict, accounts: List[Dict], 
-                            ip_data: Dict, matcher=None) -> Dict[str, Any]:
-        """Calculate comprehensive risk score for device."""
-        score = 0.0
+    def calculate_device_risk(self, device: DeviceSignals, account_risk_scores, 
+                            ip_data: Dict, matcher=None) -> RiskResult:
+        """
+        Calculate comprehensive risk score for device.
         
-        # VPN/Datacenter risk
-        if device.get('is_vpn'):
-            score += self.weights['vpn']
-        if device.get('is_datacenter'):
-            score += self.weights['datacenter']
+        Args:
+            device: Object exposing is_vpn / is_datacenter (DeviceSignals or Device)
+            account_risk_scores: Risk scores of the linked accounts, array-like
+            ip_data: IP reputation data
+            matcher: Optional DeviceMatcher
+            
+        Returns:
+            RiskResult; call to_dict() for the API payload
+        """
+        scores = np.asarray(account_risk_scores, dtype=np.float64)
+        account_count = int(scores.size)
+        suspicious_accounts = int(np.count_nonzero(scores > 60))
         
-        # Multi-account risk
-        account_count = len(accounts)
-        if account_count > 3:
-            score += self.weights['multi_account'] * (account_count / 3)
+        is_vpn = device.is_vpn
+        is_dc = device.is_datacenter
         
-        # Account quality risk
-        suspicious_accounts = sum(1 for acc in accounts 
-                                if acc.get('risk_score', 0) > 60)
-        if suspicious_accounts > 0:
-            score += 15.0
+        score, level = _score_kernel(bool(is_vpn), bool(is_dc), account_count, suspicious_accounts)
         
-        # Risk level determination
-        if score >= 70:
-            risk_level = 'high'
-        elif score >= 40:
-            risk_level = 'medium'
-        else:
-            risk_level = 'low'
+        return RiskResult(score, _LEVELS[level], is_vpn, is_dc,
+                          account_count, suspicious_accounts)
+    
+    def calculate_device_risk_batch(self, devices_df: pd.DataFrame, account_counts,
+                                    suspicious_counts) -> pd.DataFrame:
+        """
+        Score many devices at once.
+        Same rules and tiers as calculate_device_risk, evaluated column-wise.
         
-        return {
-            'risk_score': round(score, 2),
-            'risk_level': risk_level,
-            'factors': {
-                'vpn': device.get('is_vpn', False),
-                'datacenter': device.get('is_datacenter', False),
-                'account_count': account_count,
-                'suspicious_accounts': suspicious_accounts
-            }
-        }
-    def get_rules(self) -> List[Dict]:
+        Args:
+            devices_df: Frame with boolean is_vpn / is_datacenter columns
+            account_counts: Linked account count per device
+            suspicious_counts: Linked accounts with risk_score > 60 per device
+            
+        Returns:
+            Frame aligned with devices_df holding score_centi (score x 100 as
+            uint32), risk_level (categorical over int8 tier codes) and the
+            factor columns
+        """
+        is_vpn = devices_df['is_vpn'].fillna(False).to_numpy(dtype=bool)
+        is_dc = devices_df['is_datacenter'].fillna(False).to_numpy(dtype=bool)
+        ac = np.asarray(account_counts, dtype=np.int32)
+        sa = np.asarray(suspicious_counts, dtype=np.int32)
+        
+        score = (np.where(is_vpn, _W_VPN, 0.0)
+                 + np.where(is_dc, _W_DATACENTER, 0.0)
+                 + np.where(ac > 3, _W_MULTI_PER_ACCOUNT * ac, 0.0)
+                 + np.where(sa > 0, _W_SUSPICIOUS_ACCOUNTS, 0.0))
+        tier = np.searchsorted(_LEVEL_CUTS, score, side='right').astype(np.int8)
+        
+        return pd.DataFrame({
+            'score_centi': np.rint(score * 100).astype(np.uint32),
+            'risk_level': pd.Categorical.from_codes(tier, categories=_LEVELS),
+            'vpn': is_vpn,
+            'datacenter': is_dc,
+            'account_count': ac,
+            'suspicious_accounts': sa
+        }, index=devices_df.index)
+    
+    def get_rules(self) -> Tuple[Dict, ...]:
         """Return the current set of risk rules and their weights."""
-        return [
-            {'rule': 'VPN Detection', 'weight': self.weights['vpn'], 'category': 'Network'},
-            {'rule': 'Datacenter IP', 'weight': self.weights['datacenter'], 'category': 'Network'},
-            {'rule': 'Multi-account Device (>3)', 'weight': self.weights['multi_account'], 'category': 'Behavior'},
-            {'rule': 'New Account link', 'weight': self.weights['new_account'], 'category': 'Identity'},
-            {'rule': 'High velocity crossings', 'weight': self.weights['high_velocity'], 'category': 'Behavior'},
-            {'rule': 'Suspicious OS/UA', 'weight': self.weights['suspicious_os'], 'category': 'Device'},
-        ]
+        return self._rules
@@ -0,0 +1,27 @@
+import pytest
+from src.device_matcher import DeviceMatcher
+
+
+def test_similarity_matrix_matches_pairwise():
+    """Test that the packed all-vs-all matrix agrees with calculate_similarity"""
+    matcher = DeviceMatcher()
+    devices = [
+        {'os': 'Windows', 'browser': 'Chrome', 'screen_resolution': '1920x1080', 'timezone': 'UTC'},
+        {'os': 'Windows', 'browser': 'Firefox', 'screen_resolution': '1920x1080', 'timezone': 'UTC'},
+        {'os': 'macOS', 'browser': 'Safari', 'screen_resolution': '2560x1600', 'timezone': 'Europe/Berlin'},
+        {'os': 'macOS', 'browser': 'Chrome', 'timezone': 'UTC'},
+        {'os': 'Windows', 'browser': 'Chrome', 'screen_resolution': '1920x1080', 'timezone': 'UTC'},
+    ]
+    
+    matrix = matcher.similarity_matrix(matcher.encode_devices(devices))
+    
+    for i, a in enumerate(devices):
+        for j, b in enumerate(devices):
+            assert matrix[i, j] == matcher.calculate_similarity(a, b)
+
+
+def test_encode_devices_rejects_lane_overflow():
+    """Test that a field with more values than a 16-bit lane holds fails loudly"""
+    devices = [{'os': str(i)} for i in range(0x10001)]
+    with pytest.raises(ValueError):
+        DeviceMatcher().encode_devices(devices)
@@ -0,0 +1,21 @@
+from app import create_app, db
+from app.config import DevelopmentConfig
+from src import materialize
+
+
+def test_read_view_picks_up_table_built_later(monkeypatch, tmp_path):
+    """Test that a view missing at first read is used once another process builds it"""
+    monkeypatch.setattr(DevelopmentConfig, 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'fp.db'}")
+    monkeypatch.setattr(DevelopmentConfig, 'SQLALCHEMY_ENGINE_OPTIONS', {})
+    monkeypatch.setattr(materialize, 'PROBE_INTERVAL', 0)
+    app = create_app()
+    
+    with app.app_context():
+        db.create_all()
+        assert materialize.read_view('mv_os_browser_dist') == []
+        
+        # Built out-of-band: a marker row the live query would never return
+        with db.engine.begin() as conn:
+            conn.execute(db.text("CREATE TABLE mv_os_browser_dist AS SELECT 'os' AS os, 'browser' AS browser, 7 AS device_count"))
+        
+        assert [tuple(r) for r in materialize.read_view('mv_os_browser_dist')] == [('os', 'browser', 7)]
@@ -0,0 +1,26 @@
+import json
+import pandas as pd
+from src.risk_calculator import RiskCalculator, DeviceSignals
+
+
+def test_batch_matches_scalar():
+    """Test that batch scoring agrees with the per-device path"""
+    calc = RiskCalculator()
+    rows = [(vpn, dc, ac, sa) for vpn in (False, True) for dc in (False, True)
+            for ac in range(8) for sa in range(min(ac, 2) + 1)]
+    df = pd.DataFrame(rows, columns=['is_vpn', 'is_datacenter', 'account_count', 'suspicious'])
+    
+    batch = calc.calculate_device_risk_batch(df, df['account_count'], df['suspicious'])
+    
+    for (vpn, dc, ac, sa), (_, row) in zip(rows, batch.iterrows()):
+        scores = [90.0 if i < sa else 10.0 for i in range(ac)]
+        single = calc.calculate_device_risk(DeviceSignals(vpn, dc), scores, {})
+        assert row['score_centi'] / 100 == round(single.risk_score, 2)
+        assert row['risk_level'] == single.risk_level
+
+
+def test_result_dict_is_rounded_for_any_encoder():
+    """Test that to_dict() rounds the score without relying on the app's JSON provider"""
+    result = RiskCalculator().calculate_device_risk(DeviceSignals(), [10.0] * 4, {})
+    assert result.risk_score != round(result.risk_score, 2)
+    assert json.loads(json.dumps(result.to_dict()))['risk_score'] == 26.67
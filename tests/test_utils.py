@@ -0,0 +1,32 @@
+import pytest
+from cryptography.fernet import Fernet
+from datetime import datetime, timedelta
+from app.utils import (encrypt_sensitive_data, decrypt_sensitive_data,
+                       is_data_expired, is_data_expired_bulk)
+
+
+def test_encryption_roundtrip():
+    """Test that encrypted data decrypts with the same key"""
+    key = Fernet.generate_key().decode()
+    token = encrypt_sensitive_data({'iban': 'DE89370400440532013000'}, key)
+    assert decrypt_sensitive_data(token, key) == {'iban': 'DE89370400440532013000'}
+
+
+def test_encryption_requires_key(monkeypatch):
+    """Test that a missing key fails instead of generating a throwaway one"""
+    monkeypatch.setattr('app.utils._ENCRYPTION_KEY', None)
+    with pytest.raises(ValueError):
+        encrypt_sensitive_data({'iban': 'DE89370400440532013000'})
+
+
+def test_retention_bulk_matches_scalar():
+    """Test that the vectorized retention mask agrees with is_data_expired"""
+    now = datetime(2024, 6, 1)
+    created = [now - timedelta(days=d) for d in (1, 89, 91, 400)]
+    epoch = datetime(1970, 1, 1)
+    
+    mask = is_data_expired_bulk([(c - epoch).total_seconds() for c in created],
+                                now_ts=(now - epoch).total_seconds())
+    
+    assert list(mask) == [is_data_expired(c, now=now) for c in created]
+    assert list(mask) == [False, False, True, True]